@@ -1,8 +1,12 @@
+import json
 import os
+import time
+from collections.abc import Iterator
 
 import requests
 import streamlit as st
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 
 load_dotenv(override=True)
 
@@ -17,6 +21,7 @@ SUGGESTED_PROMPTS = [
     "OpenStack instance stuck in ERROR",
     "Delete all available OpenStack volumes with a safe script",
 ]
+REPLY_CACHE_TTL_SECONDS = 600
 
 st.set_page_config(page_title="GlueBot", page_icon=":robot_face:", layout="centered")
 
@@ -24,20 +29,108 @@ if "messages" not in st.session_state:
     st.session_state.messages = []
 
 
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
 def call_chat_api(message: str) -> dict[str, str]:
-    response = requests.post(
+    with get_http_session().post(
         f"{BACKEND_URL}/chat",
         json={"message": message},
         timeout=15,
-    )
-    response.raise_for_status()
-    data = response.json()
+    ) as response:
+        response.raise_for_status()
+        data = response.json()
     return {
         "reply": data.get("reply", "No reply received."),
         "source": data.get("source", "unknown"),
     }
 
 
+# Carries an LLM or fallback reply out of the cached function without caching it.
+class UncacheableReply(Exception):
+    def __init__(self, result: dict[str, str]) -> None:
+        super().__init__(result["source"])
+        self.result = result
+
+
+@st.cache_data(ttl=REPLY_CACHE_TTL_SECONDS, max_entries=512, show_spinner=False)
+def cached_call_chat_api(message: str) -> dict[str, str]:
+    # Only intent, knowledge-base and script replies are deterministic enough to reuse.
+    result = call_chat_api(message)
+    if result["source"].startswith(("llm:", "fallback:")):
+        raise UncacheableReply(result)
+    return result
+
+
+def prefetch_quick_prompts() -> None:
+    # Answers the quick prompts that resolve locally in one /chat_batch call, kept per session.
+    # `local_only` keeps the backend from calling the LLM or recording the prompts as unknown issues.
+    if not st.session_state.get("cache_replies", True):
+        return
+    prefetched = st.session_state.get("prefetched_replies")
+    if prefetched and time.monotonic() - prefetched["at"] < REPLY_CACHE_TTL_SECONDS:
+        return
+
+    replies: dict[str, dict[str, str]] = {}
+    try:
+        with get_http_session().post(
+            f"{BACKEND_URL}/chat_batch",
+            json={"messages": SUGGESTED_PROMPTS, "local_only": True},
+            timeout=5,
+        ) as response:
+            response.raise_for_status()
+            data = response.json()
+        for prompt, item in zip(SUGGESTED_PROMPTS, data):
+            if isinstance(item, dict) and "reply" in item:
+                replies[prompt] = {"reply": item["reply"], "source": item.get("source", "unknown")}
+    except (requests.RequestException, ValueError, TypeError):
+        pass
+    st.session_state.prefetched_replies = {"at": time.monotonic(), "replies": replies}
+
+
+def get_reply(message: str) -> dict[str, str]:
+    if not st.session_state.get("cache_replies", True):
+        return call_chat_api(message)
+    prefetched = st.session_state.get("prefetched_replies")
+    if prefetched and time.monotonic() - prefetched["at"] < REPLY_CACHE_TTL_SECONDS:
+        if message in prefetched["replies"]:
+            return prefetched["replies"][message]
+    try:
+        return cached_call_chat_api(message)
+    except UncacheableReply as exc:
+        return exc.result
+
+
+def stream_chat_api(message: str, meta: dict[str, str]) -> Iterator[str]:
+    # Yields reply chunks from /chat_stream; the reply source is stored in `meta`.
+    with get_http_session().post(
+        f"{BACKEND_URL}/chat_stream",
+        json={"message": message},
+        stream=True,
+        timeout=15,
+    ) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line.startswith(b"data:"):
+                continue
+            try:
+                event = json.loads(line[len(b"data:"):])
+            except ValueError:
+                continue
+            if not isinstance(event, dict):
+                continue
+            if "delta" in event:
+                yield event["delta"]
+            if "source" in event:
+                meta["source"] = event["source"]
+
+
 def send_user_message(message: str) -> None:
     msg = message.strip()
     if not msg:
@@ -46,7 +139,7 @@ def send_user_message(message: str) -> None:
     st.session_state.messages.append({"role": "user", "content": msg})
     try:
         with st.spinner("GlueBot is thinking..."):
-            result = call_chat_api(msg)
+            result = get_reply(msg)
         st.session_state.messages.append(
             {
                 "role": "assistant",
@@ -64,6 +157,28 @@ def send_user_message(message: str) -> None:
         )
 
 
+def stream_user_message(message: str) -> None:
+    msg = message.strip()
+    if not msg:
+        return
+
+    st.session_state.messages.append({"role": "user", "content": msg})
+    with st.chat_message("user"):
+        st.markdown(msg)
+
+    meta: dict[str, str] = {}
+    with st.chat_message("assistant"):
+        try:
+            reply = st.write_stream(stream_chat_api(msg, meta))
+            source = meta.get("source", "unknown")
+        except requests.RequestException as exc:
+            reply = f"Chat request failed: {exc}"
+            source = "error"
+    st.session_state.messages.append({"role": "assistant", "content": reply, "source": source})
+
+
+prefetch_quick_prompts()
+
 st.title("GlueBot")
 st.caption("Kubernetes + OpenStack assistant")
 
@@ -72,12 +187,19 @@ with st.sidebar:
     st.caption(f"LLM configured: {'Yes' if (OPENAI_API_KEY or OPENROUTER_API_KEY) else 'No'}")
     if st.button("Check API health", use_container_width=True):
         try:
-            response = requests.get(f"{BACKEND_URL}/", timeout=5)
-            response.raise_for_status()
+            with get_http_session().get(f"{BACKEND_URL}/", timeout=5) as response:
+                response.raise_for_status()
             st.success("API is reachable")
         except requests.RequestException as exc:
             st.error(f"API unreachable: {exc}")
 
+    st.toggle(
+        "Cache replies",
+        value=True,
+        key="cache_replies",
+        help="Prefetch and reuse knowledge-base, intent and script replies to quick prompts for 10 minutes. LLM replies are never cached.",
+    )
+
     if st.button("Clear chat", use_container_width=True):
         st.session_state.messages = []
         st.rerun()
@@ -101,5 +223,5 @@ for message in st.session_state.messages:
 
 user_input = st.chat_input("Ask GlueBot about your issue...")
 if user_input:
-    send_user_message(user_input)
+    stream_user_message(user_input)
     st.rerun()
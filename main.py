@@ -1,55 +1,118 @@
-import json
+import asyncio
+import bisect
+import contextlib
+import functools
+import gzip
+import heapq
+import logging
 import os
 import re
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
 from pathlib import Path
 
-import requests
-from fastapi import FastAPI
+import httpx
+import orjson
+from fastapi import BackgroundTasks, FastAPI
+from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-app = FastAPI(title="gluebot1")
-KNOWLEDGE_PATH = Path(__file__).with_name("knowledge.json")
-DOTENV_PATH = Path(__file__).with_name(".env")
-load_dotenv(dotenv_path=DOTENV_PATH, override=True)
+try:
+    import ahocorasick
+except ImportError:  # optional: speeds up substring matching on large KBs
+    ahocorasick = None
 
+try:
+    import numpy as np
+except ImportError:  # optional: vectorized scoring for large KBs
+    np = None
 
-class ChatRequest(BaseModel):
-    message: str
+try:
+    from scipy import sparse
+except ImportError:  # optional: sparse-matrix scoring for large KBs
+    sparse = None
 
+try:
+    import numba
 
-class ChatResponse(BaseModel):
-    reply: str
-    source: str
-
-
-def _smalltalk_reply(message: str) -> str | None:
-    text = message.strip().lower()
-    if not text:
-        return "Please type a message so I can help."
+    # TBB hangs at exit if its pool is first started off the main thread (e.g. from a worker).
+    numba.config.THREADING_LAYER_PRIORITY = ["omp", "workqueue", "tbb"]
+except ImportError:  # optional: compiled scoring kernel for large KBs
+    numba = None
 
-    greetings = {"hi", "hello", "hey", "yo", "good morning", "good afternoon", "good evening"}
-    thanks = {"thanks", "thank you", "thx"}
-
-    if text in greetings:
-        return (
-            "Hi, I can help with Kubernetes and OpenStack operations. "
-            "Try: `pod stuck in termination`, `CrashLoopBackOff`, or "
-            "`delete all available openstack volumes`."
-        )
-    if text in thanks:
-        return "You are welcome. Share the next issue when ready."
-    if text in {"help", "what can you do", "what can you help with"}:
-        return (
-            "I can troubleshoot Kubernetes and OpenStack issues, and generate safe scripts. "
-            "Include exact errors and I will provide step-by-step commands."
-        )
-    return None
+logger = logging.getLogger(__name__)
 
+KNOWLEDGE_PATH = Path(__file__).with_name("knowledge.json")
+DOTENV_PATH = Path(__file__).with_name(".env")
 
-def _is_incident_like(message: str) -> bool:
-    tokens = set(re.findall(r"[a-z0-9]+", message.lower()))
-    incident_keywords = {
+OPENAI_API_KEY = ""
+OPENROUTER_API_KEY = ""
+LLM_API_KEY = ""
+LLM_MODEL = ""
+LLM_API_BASE = ""
+OPENROUTER_SITE_URL = ""
+OPENROUTER_APP_NAME = ""
+LLM_COMPRESS_REQUESTS = False
+_GZIP_MIN_BYTES = 1024
+_env_mtime_ns: int | None = -1
+
+_http_client: httpx.AsyncClient | None = None
+_KB_CACHE: tuple[int, int, list[dict]] | None = None
+_kb_version = 0
+_MEMO_MAX_CHARS = 512
+
+# Unknown issues are buffered and written back to knowledge.json in batches.
+_FLUSH_INTERVAL_SECONDS = 2.0
+_FLUSH_BATCH_SIZE = 16
+_pending_unknowns: list[dict] = []
+_pending_lock: asyncio.Lock | None = None  # created per event loop in _lifespan; None means write through
+_flush_requested: asyncio.Event | None = None
+_flush_task: asyncio.Task | None = None
+
+# Answered KB entries as parallel arrays, rebuilt only when knowledge.json changes.
+_kb_questions: list[str] = []
+_kb_questions_lower: list[str] = []
+_kb_question_tokens: list[frozenset[str]] = []
+_kb_qtoken_lens: list[int] = []
+_kb_answers: list[str] = []
+_kb_index: dict[str, list[int]] = {}
+_token_cols: dict[str, int] = {}
+_token_bits: dict[str, int] = {}
+_kb_bits: list[int] = []
+_VECTOR_MIN_ENTRIES = 1000
+_kb_matrix = None
+_kb_token_ids = None
+_kb_token_offsets = None
+_score_kernel_warm = False
+_kb_qtoken_lens_array = None
+_kb_automaton = None
+_kb_questions_blob = ""
+_kb_blob_offsets: list[int] = []
+_kb_context = "- No curated KB answers yet."
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_GREETINGS = frozenset({"hi", "hello", "hey", "yo", "good morning", "good afternoon", "good evening"})
+_THANKS = frozenset({"thanks", "thank you", "thx"})
+_HELP_REQUESTS = frozenset({"help", "what can you do", "what can you help with"})
+# Substring triggers for the script template and rule-based fallback, matched in a single pass.
+_TRIGGER_KEYWORDS = (
+    "openstack",
+    "volume",
+    "delete",
+    "remove",
+    "available",
+    "liveness",
+    "readiness",
+    "probe",
+    "500",
+    "nova",
+    "neutron",
+    "cinder",
+)
+_TRIGGER_SCANNER = re.compile("(?=(" + "|".join(map(re.escape, _TRIGGER_KEYWORDS)) + "))")
+_INCIDENT_KEYWORDS = frozenset(
+    {
         "pod",
         "kubernetes",
         "k8s",
@@ -73,17 +136,111 @@ def _is_incident_like(message: str) -> bool:
         "instance",
         "server",
     }
-    return bool(tokens & incident_keywords)
+)
+
+
+def _maybe_reload_env() -> None:
+    # Re-read .env only when it changes so edits apply without a restart.
+    global _env_mtime_ns, OPENAI_API_KEY, OPENROUTER_API_KEY, LLM_API_KEY, LLM_MODEL
+    global LLM_API_BASE, OPENROUTER_SITE_URL, OPENROUTER_APP_NAME, LLM_COMPRESS_REQUESTS
+    try:
+        mtime_ns = DOTENV_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime_ns = None
+    if mtime_ns == _env_mtime_ns:
+        return
+
+    if mtime_ns is not None:
+        load_dotenv(dotenv_path=DOTENV_PATH, override=True)
+    _env_mtime_ns = mtime_ns
+    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "").strip()
+    OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "").strip()
+    LLM_API_KEY = OPENAI_API_KEY or OPENROUTER_API_KEY
+    LLM_MODEL = os.getenv("OPENAI_MODEL", "gpt-4.1-mini").strip()
+    LLM_API_BASE = os.getenv("LLM_API_BASE", "").strip()
+    OPENROUTER_SITE_URL = os.getenv("OPENROUTER_SITE_URL", "").strip()
+    OPENROUTER_APP_NAME = os.getenv("OPENROUTER_APP_NAME", "GlueBot").strip()
+    LLM_COMPRESS_REQUESTS = os.getenv("LLM_COMPRESS_REQUESTS", "").strip().lower() in {"1", "true", "yes"}
+
+
+_maybe_reload_env()
+
+
+class ChatRequest(BaseModel):
+    message: str
+
+
+class ChatBatchRequest(BaseModel):
+    messages: list[str] = Field(max_length=32)
+    local_only: bool = False
+
+
+class ChatResponse(BaseModel):
+    reply: str
+    source: str
 
 
-def _openstack_script_reply(message: str) -> str | None:
-    text = message.lower()
-    if (
-        "openstack" in text
-        and "volume" in text
-        and ("delete" in text or "remove" in text)
-        and "available" in text
-    ):
+@dataclass(frozen=True, slots=True)
+class NormalizedMsg:
+    raw: str
+    stripped: str
+    lower: str
+    tokens: frozenset[str]
+
+
+def _normalize(message: str) -> NormalizedMsg:
+    stripped = message.strip()
+    lower = stripped.lower()
+    return NormalizedMsg(raw=message, stripped=stripped, lower=lower, tokens=frozenset(_TOKEN_RE.findall(lower)))
+
+
+def _memoize_short(func):
+    # Memoize on the message text, skipping long messages so clients cannot pin large strings in memory.
+    cached = functools.lru_cache(maxsize=4096)(func)
+
+    @functools.wraps(func)
+    def wrapper(text: str, *args):
+        if len(text) > _MEMO_MAX_CHARS:
+            return func(text, *args)
+        return cached(text, *args)
+
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
+
+
+@_memoize_short
+def _smalltalk_reply(text: str) -> str | None:
+    if not text:
+        return "Please type a message so I can help."
+
+    if text in _GREETINGS:
+        return (
+            "Hi, I can help with Kubernetes and OpenStack operations. "
+            "Try: `pod stuck in termination`, `CrashLoopBackOff`, or "
+            "`delete all available openstack volumes`."
+        )
+    if text in _THANKS:
+        return "You are welcome. Share the next issue when ready."
+    if text in _HELP_REQUESTS:
+        return (
+            "I can troubleshoot Kubernetes and OpenStack issues, and generate safe scripts. "
+            "Include exact errors and I will provide step-by-step commands."
+        )
+    return None
+
+
+def _is_incident_like(msg: NormalizedMsg) -> bool:
+    return bool(msg.tokens & _INCIDENT_KEYWORDS)
+
+
+def _scan_triggers(text: str) -> set[str]:
+    return {match.group(1) for match in _TRIGGER_SCANNER.finditer(text)}
+
+
+@_memoize_short
+def _openstack_script_reply(text: str) -> str | None:
+    triggers = _scan_triggers(text)
+    if {"openstack", "volume", "available"} <= triggers and ("delete" in triggers or "remove" in triggers):
         return (
             "Use this safe script (dry-run by default) to delete all OpenStack volumes in `available` state:\n\n"
             "```bash\n"
@@ -113,195 +270,447 @@ def _openstack_script_reply(message: str) -> str | None:
     return None
 
 
+def _index_knowledge(knowledge: list[dict]) -> None:
+    global _kb_questions, _kb_questions_lower, _kb_question_tokens, _kb_qtoken_lens, _kb_answers, _kb_index
+    global _token_cols, _token_bits, _kb_bits, _kb_matrix, _kb_token_ids, _kb_token_offsets, _kb_qtoken_lens_array
+    global _kb_automaton, _kb_questions_blob, _kb_blob_offsets, _kb_context, _kb_version, _score_kernel_warm
+    questions: list[str] = []
+    answers: list[str] = []
+    for item in knowledge:
+        question = str(item.get("question", item.get("q", ""))).strip()
+        answer = str(item.get("answer", item.get("a", ""))).strip()
+        if question and answer:
+            questions.append(question)
+            answers.append(answer)
+
+    _kb_questions = questions
+    _kb_questions_lower = [question.lower() for question in questions]
+    _kb_question_tokens = [frozenset(_TOKEN_RE.findall(question)) for question in _kb_questions_lower]
+    _kb_qtoken_lens = [len(tokens) for tokens in _kb_question_tokens]
+    _kb_answers = answers
+
+    index: dict[str, list[int]] = {}
+    for i, tokens in enumerate(_kb_question_tokens):
+        for token in tokens:
+            index.setdefault(token, []).append(i)
+    _kb_index = index
+
+    # One bit per distinct KB token; an entry's overlap with a message is a single popcount.
+    _token_cols = {token: col for col, token in enumerate(index)}
+    _token_bits = {token: 1 << col for token, col in _token_cols.items()}
+    bits: list[int] = []
+    for tokens in _kb_question_tokens:
+        mask = 0
+        for token in tokens:
+            mask |= _token_bits[token]
+        bits.append(mask)
+    _kb_bits = bits
+
+    # Large KBs are scored in bulk: by the numba kernel over sorted token ids when available,
+    # otherwise with one sparse mat-vec over the same token columns.
+    _kb_matrix = None
+    _kb_token_ids = None
+    _kb_token_offsets = None
+    _kb_qtoken_lens_array = None
+    if np is not None and (numba is not None or sparse is not None) and len(questions) >= _VECTOR_MIN_ENTRIES:
+        _kb_qtoken_lens_array = np.maximum(np.array(_kb_qtoken_lens, dtype=np.float64), 1.0)
+        if numba is not None:
+            _kb_token_ids = np.array(
+                [col for tokens in _kb_question_tokens for col in sorted(_token_cols[token] for token in tokens)],
+                dtype=np.int32,
+            )
+            _kb_token_offsets = np.zeros(len(questions) + 1, dtype=np.int64)
+            np.cumsum(_kb_qtoken_lens, out=_kb_token_offsets[1:])
+            if not _score_kernel_warm:
+                # Compile and start the thread pool now rather than on the first request.
+                _score_all(
+                    np.empty(0, dtype=np.int32),
+                    _kb_token_ids,
+                    _kb_token_offsets,
+                    _kb_qtoken_lens_array,
+                    np.empty(len(questions), dtype=np.float64),
+                )
+                _score_kernel_warm = True
+        else:
+            rows = [i for i, tokens in enumerate(_kb_question_tokens) for _ in tokens]
+            cols = [_token_cols[token] for tokens in _kb_question_tokens for token in tokens]
+            _kb_matrix = sparse.csr_matrix(
+                (np.ones(len(rows), dtype=np.float64), (rows, cols)),
+                shape=(len(questions), len(_token_cols)),
+            )
+
+    _kb_automaton = None
+    if ahocorasick is not None and _kb_questions_lower:
+        automaton = ahocorasick.Automaton()
+        for i, question in enumerate(_kb_questions_lower):
+            if not automaton.exists(question):
+                automaton.add_word(question, i)
+        automaton.make_automaton()
+        _kb_automaton = automaton
+
+    offsets: list[int] = []
+    position = 0
+    for question in _kb_questions_lower:
+        offsets.append(position)
+        position += len(question) + 1
+    _kb_questions_blob = "\n".join(_kb_questions_lower)
+    _kb_blob_offsets = offsets
+
+    topic_list = [f"- {question}: {answer}" for question, answer in zip(questions[:30], answers[:30])]
+    _kb_context = "\n".join(topic_list) if topic_list else "- No curated KB answers yet."
+
+    _kb_version += 1
+    _find_reply.cache_clear()
+
+
+def _substring_match(text: str) -> int | None:
+    # Index of the first KB question contained in `text` or containing it.
+    if _kb_automaton is None:
+        for i, question in enumerate(_kb_questions_lower):
+            if question in text or text in question:
+                return i
+        return None
+
+    matches = [i for _, i in _kb_automaton.iter(text)]
+    if "\n" not in text:
+        position = _kb_questions_blob.find(text)
+        if position >= 0:
+            matches.append(bisect.bisect_right(_kb_blob_offsets, position) - 1)
+    return min(matches, default=None)
+
+
+def _token_hits(msg_tokens: frozenset[str]) -> dict[int, int]:
+    msg_bits = 0
+    candidates: set[int] = set()
+    for token in msg_tokens:
+        postings = _kb_index.get(token)
+        if postings:
+            msg_bits |= _token_bits[token]
+            candidates.update(postings)
+    return {i: (msg_bits & _kb_bits[i]).bit_count() for i in candidates}
+
+
+def _overlap_rank(hit: tuple[int, int]) -> tuple[float, int]:
+    # Higher overlap first; ties go to the earlier KB entry.
+    i, count = hit
+    return count / _kb_qtoken_lens[i], -i
+
+
+if numba is not None:
+
+    @numba.njit(parallel=True, cache=True)
+    def _score_all(msg_ids, kb_ids_flat, kb_offsets, kb_lens, out):
+        # Merge-intersect the sorted message ids with each entry's sorted ids.
+        for i in numba.prange(len(kb_lens)):
+            a = kb_offsets[i]
+            end = kb_offsets[i + 1]
+            j = 0
+            hits = 0
+            while a < end and j < len(msg_ids):
+                if kb_ids_flat[a] == msg_ids[j]:
+                    hits += 1
+                    a += 1
+                    j += 1
+                elif kb_ids_flat[a] < msg_ids[j]:
+                    a += 1
+                else:
+                    j += 1
+            out[i] = hits / kb_lens[i]
+
+
+def _vector_scores(msg_tokens: frozenset[str]):
+    cols = sorted(_token_cols[token] for token in msg_tokens if token in _token_cols)
+    if not cols:
+        return None
+
+    if _kb_token_ids is not None:
+        scores = np.empty(len(_kb_qtoken_lens_array), dtype=np.float64)
+        _score_all(np.array(cols, dtype=np.int32), _kb_token_ids, _kb_token_offsets, _kb_qtoken_lens_array, scores)
+        return scores
+
+    query = np.zeros(_kb_matrix.shape[1], dtype=np.float64)
+    query[cols] = 1.0
+    return (_kb_matrix @ query) / _kb_qtoken_lens_array
+
+
+def _vector_top_matches(msg_tokens: frozenset[str], limit: int) -> list[tuple[float, int]]:
+    scores = _vector_scores(msg_tokens)
+    if scores is None:
+        return []
+
+    candidates = np.flatnonzero(scores)
+    if len(candidates) > limit:
+        kth = np.partition(scores[candidates], -limit)[-limit]
+        candidates = candidates[scores[candidates] >= kth]
+    order = np.lexsort((candidates, -scores[candidates]))[:limit]
+    return [(float(scores[candidates[j]]), int(candidates[j])) for j in order]
+
+
+def _top_matches(msg_tokens: frozenset[str], limit: int) -> list[tuple[float, int]]:
+    # (overlap, KB index) pairs with a non-zero overlap, best first.
+    if _kb_qtoken_lens_array is not None:
+        return _vector_top_matches(msg_tokens, limit)
+
+    top = heapq.nlargest(limit, _token_hits(msg_tokens).items(), key=_overlap_rank)
+    return [(_overlap_rank(hit)[0], hit[0]) for hit in top]
+
+
 def _load_knowledge() -> list[dict]:
-    if not KNOWLEDGE_PATH.exists() or KNOWLEDGE_PATH.stat().st_size == 0:
+    global _KB_CACHE
+    try:
+        stat = KNOWLEDGE_PATH.stat()
+    except FileNotFoundError:
+        stat = None
+    if stat is None or stat.st_size == 0:
+        if _KB_CACHE is not None:
+            _KB_CACHE = None
+            _index_knowledge([])
         return []
+
+    if _KB_CACHE is not None and _KB_CACHE[:2] == (stat.st_mtime_ns, stat.st_size):
+        return _KB_CACHE[2]
+
     try:
-        data = json.loads(KNOWLEDGE_PATH.read_text(encoding="utf-8"))
-    except json.JSONDecodeError:
+        data = orjson.loads(KNOWLEDGE_PATH.read_bytes())
+    except orjson.JSONDecodeError:
+        if _KB_CACHE is not None:
+            _KB_CACHE = None
+            _index_knowledge([])
         return []
 
     if isinstance(data, list):
-        return [item for item in data if isinstance(item, dict)]
-    if isinstance(data, dict):
-        return [data]
-    return []
+        knowledge = [item for item in data if isinstance(item, dict)]
+    elif isinstance(data, dict):
+        knowledge = [data]
+    else:
+        knowledge = []
+
+    _index_knowledge(knowledge)
+    _KB_CACHE = (stat.st_mtime_ns, stat.st_size, knowledge)
+    return knowledge
 
 
-def _find_reply(message: str, knowledge: list[dict]) -> str | None:
-    text = message.strip().lower()
+@_memoize_short
+def _find_reply(text: str, tokens: frozenset[str], kb_version: int) -> str | None:
     if not text:
         return "Please type a message so I can help."
 
-    msg_tokens = set(re.findall(r"[a-z0-9]+", text))
-    for item in knowledge:
-        question = str(item.get("question", item.get("q", ""))).strip().lower()
-        answer = str(item.get("answer", item.get("a", ""))).strip()
-        if not (question and answer):
-            continue
-
-        if question in text or text in question:
-            return answer
+    i = _substring_match(text)
+    if i is not None:
+        return _kb_answers[i]
 
-        q_tokens = set(re.findall(r"[a-z0-9]+", question))
-        if not q_tokens:
-            continue
-        overlap = len(msg_tokens & q_tokens) / len(q_tokens)
-        if overlap >= 0.6:
-            return answer
+    best = _top_matches(tokens, 1)
+    if best and best[0][0] >= 0.6:
+        return _kb_answers[best[0][1]]
 
     return None
 
 
 def _save_knowledge(knowledge: list[dict]) -> None:
-    KNOWLEDGE_PATH.write_text(json.dumps(knowledge, indent=2), encoding="utf-8")
+    tmp_path = KNOWLEDGE_PATH.with_name(KNOWLEDGE_PATH.name + ".tmp")
+    tmp_path.write_bytes(orjson.dumps(knowledge, option=orjson.OPT_INDENT_2))
+    os.replace(tmp_path, KNOWLEDGE_PATH)
 
 
-def _track_unknown_issue(message: str, knowledge: list[dict]) -> None:
-    question = message.strip()
+async def _track_unknown_issue(question: str) -> None:
     if not question:
         return
 
-    existing_questions = {
-        str(item.get("question", item.get("q", ""))).strip().lower()
-        for item in knowledge
-        if isinstance(item, dict)
+    entry = {
+        "question": question,
+        "answer": "",
+        "status": "unresolved",
+        "note": "Captured from unknown user issue. Fill answer later.",
     }
-    if question.lower() in existing_questions:
+    if _pending_lock is None:
+        # No lifespan (e.g. a mounted sub-app) means no flush loop, so write through immediately.
+        _pending_unknowns.append(entry)
+        knowledge = _merge_pending_unknowns()
+        if knowledge is not None:
+            _save_knowledge(knowledge)
+        _pending_unknowns.clear()
         return
 
-    knowledge.append(
-        {
-            "question": question,
-            "answer": "",
-            "status": "unresolved",
-            "note": "Captured from unknown user issue. Fill answer later.",
-        }
-    )
-    _save_knowledge(knowledge)
-
+    async with _pending_lock:
+        _pending_unknowns.append(entry)
+        if len(_pending_unknowns) >= _FLUSH_BATCH_SIZE:
+            _flush_requested.set()
 
-def _llm_reply(message: str, knowledge: list[dict]) -> str | None:
-    load_dotenv(dotenv_path=DOTENV_PATH, override=True)
-    openai_api_key = os.getenv("OPENAI_API_KEY", "").strip()
-    openrouter_api_key = os.getenv("OPENROUTER_API_KEY", "").strip()
-    llm_api_key = openai_api_key or openrouter_api_key
-    llm_model = os.getenv("OPENAI_MODEL", "gpt-4.1-mini").strip()
-    llm_api_base = os.getenv("LLM_API_BASE", "").strip()
-    openrouter_site_url = os.getenv("OPENROUTER_SITE_URL", "").strip()
-    openrouter_app_name = os.getenv("OPENROUTER_APP_NAME", "GlueBot").strip()
 
-    if not llm_api_key:
+def _merge_pending_unknowns() -> list[dict] | None:
+    # Returns the KB with new pending questions appended, or None when there is nothing new.
+    knowledge = list(_load_knowledge())
+    existing_questions = {
+        str(item.get("question", item.get("q", ""))).strip().lower()
+        for item in knowledge
+    }
+    added = False
+    for entry in _pending_unknowns:
+        key = entry["question"].lower()
+        if key not in existing_questions:
+            existing_questions.add(key)
+            knowledge.append(entry)
+            added = True
+    return knowledge if added else None
+
+
+async def _flush_unknowns() -> None:
+    async with _pending_lock:
+        if not _pending_unknowns:
+            return
+
+        knowledge = _merge_pending_unknowns()
+        if knowledge is not None:
+            await asyncio.to_thread(_save_knowledge, knowledge)
+        _pending_unknowns.clear()
+
+
+async def _flush_loop() -> None:
+    while True:
+        try:
+            await asyncio.wait_for(_flush_requested.wait(), timeout=_FLUSH_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        _flush_requested.clear()
+        try:
+            await _flush_unknowns()
+        except Exception:
+            # Keep the pending entries and retry on the next tick.
+            logger.exception("Failed to write unknown issues to %s", KNOWLEDGE_PATH)
+
+
+def _llm_request(message: str) -> tuple[str, dict[str, str], dict, bool] | None:
+    if not LLM_API_KEY or _http_client is None:
         return None
 
-    topic_list = []
-    for item in knowledge[:30]:
-        question = str(item.get("question", item.get("q", ""))).strip()
-        answer = str(item.get("answer", item.get("a", ""))).strip()
-        if question and answer:
-            topic_list.append(f"- {question}: {answer}")
-    kb_context = "\n".join(topic_list) if topic_list else "- No curated KB answers yet."
-
     prompt = (
         "You are GlueBot, a Kubernetes + OpenStack SRE assistant. "
         "Provide concise, actionable troubleshooting steps. "
         "For Kubernetes, include kubectl commands. For OpenStack, include openstack CLI commands. "
         "If user asks for scripts/automation, return a safe script with dry-run default and a short warning.\n\n"
-        f"Known KB:\n{kb_context}\n\n"
+        f"Known KB:\n{_kb_context}\n\n"
         f"User issue: {message}"
     )
 
-    base = llm_api_base.lower()
-    is_openrouter = "openrouter" in base or bool(openrouter_api_key)
+    base = LLM_API_BASE.lower()
+    is_openrouter = "openrouter" in base or bool(OPENROUTER_API_KEY)
 
     headers = {
-        "Authorization": f"Bearer {llm_api_key}",
+        "Authorization": f"Bearer {LLM_API_KEY}",
         "Content-Type": "application/json",
     }
     if is_openrouter:
-        if openrouter_site_url:
-            headers["HTTP-Referer"] = openrouter_site_url
-        if openrouter_app_name:
-            headers["X-Title"] = openrouter_app_name
-
-    try:
-        if is_openrouter:
-            url = llm_api_base or "https://openrouter.ai/api/v1/chat/completions"
-            response = requests.post(
-                url,
-                headers=headers,
-                json={
-                    "model": llm_model,
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": (
-                                "You are GlueBot, a Kubernetes + OpenStack SRE assistant. "
-                                "Give concise troubleshooting steps and safe automation scripts."
-                            ),
-                        },
-                        {"role": "user", "content": prompt},
-                    ],
+        if OPENROUTER_SITE_URL:
+            headers["HTTP-Referer"] = OPENROUTER_SITE_URL
+        if OPENROUTER_APP_NAME:
+            headers["X-Title"] = OPENROUTER_APP_NAME
+
+        url = LLM_API_BASE or "https://openrouter.ai/api/v1/chat/completions"
+        body = {
+            "model": LLM_MODEL,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": (
+                        "You are GlueBot, a Kubernetes + OpenStack SRE assistant. "
+                        "Give concise troubleshooting steps and safe automation scripts."
+                    ),
                 },
-                timeout=20,
-            )
-            response.raise_for_status()
-            data = response.json()
-            return (
-                data.get("choices", [{}])[0]
-                .get("message", {})
-                .get("content", "")
-                .strip()
-                or None
-            )
+                {"role": "user", "content": prompt},
+            ],
+        }
+        return url, headers, body, True
 
-        url = llm_api_base or "https://api.openai.com/v1/responses"
-        response = requests.post(
-            url,
-            headers=headers,
-            json={
-                "model": llm_model,
-                "input": prompt,
-            },
-            timeout=20,
-        )
+    url = LLM_API_BASE or "https://api.openai.com/v1/responses"
+    body = {
+        "model": LLM_MODEL,
+        "input": prompt,
+    }
+    return url, headers, body, False
+
+
+def _encode_body(body: dict) -> tuple[bytes, dict[str, str]]:
+    # Gzip larger prompts when the provider is known to accept compressed request bodies.
+    content = orjson.dumps(body)
+    if LLM_COMPRESS_REQUESTS and len(content) >= _GZIP_MIN_BYTES:
+        return gzip.compress(content, compresslevel=5), {"Content-Encoding": "gzip"}
+    return content, {}
+
+
+async def _llm_reply(message: str) -> str | None:
+    request = _llm_request(message)
+    if request is None:
+        return None
+    url, headers, body, is_openrouter = request
+
+    try:
+        content, extra_headers = _encode_body(body)
+        response = await _http_client.post(url, headers={**headers, **extra_headers}, content=content)
         response.raise_for_status()
-        data = response.json()
-        text = (data.get("output_text") or "").strip()
-        return text or None
-    except requests.RequestException:
+        data = orjson.loads(response.content)
+    except (httpx.HTTPError, ValueError):
+        return None
+    if not isinstance(data, dict):
         return None
 
+    if is_openrouter:
+        return (
+            (data.get("choices") or [{}])[0]
+            .get("message", {})
+            .get("content", "")
+            .strip()
+            or None
+        )
 
-def _related_topics(message: str, knowledge: list[dict], limit: int = 3) -> list[str]:
-    msg_tokens = set(re.findall(r"[a-z0-9]+", message.lower()))
-    scored: list[tuple[float, str]] = []
-    for item in knowledge:
-        question = str(item.get("question", item.get("q", ""))).strip()
-        answer = str(item.get("answer", item.get("a", ""))).strip()
-        if not question:
-            continue
-        if not answer:
-            continue
-        q_tokens = set(re.findall(r"[a-z0-9]+", question.lower()))
-        if not q_tokens:
-            continue
-        score = len(msg_tokens & q_tokens) / len(q_tokens)
-        if score > 0:
-            scored.append((score, question))
-
-    scored.sort(key=lambda x: x[0], reverse=True)
-    return [topic for _, topic in scored[:limit]]
-
-
-def _fallback_reply(message: str, knowledge: list[dict]) -> str:
-    text = message.lower()
-    related = _related_topics(message, knowledge)
+    text = (data.get("output_text") or "").strip()
+    return text or None
+
+
+async def _llm_stream(message: str) -> AsyncIterator[str]:
+    request = _llm_request(message)
+    if request is None:
+        return
+    url, headers, body, is_openrouter = request
+
+    content, extra_headers = _encode_body({**body, "stream": True})
+    async with _http_client.stream("POST", url, headers={**headers, **extra_headers}, content=content) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            try:
+                event = orjson.loads(data)
+            except ValueError:
+                continue
+            if not isinstance(event, dict):
+                continue
+
+            if is_openrouter:
+                delta = (event.get("choices") or [{}])[0].get("delta", {}).get("content")
+            elif event.get("type") == "response.output_text.delta":
+                delta = event.get("delta")
+            else:
+                delta = None
+            if delta:
+                yield delta
+
+
+def _related_topics(msg: NormalizedMsg, limit: int = 3) -> list[str]:
+    top = _top_matches(msg.tokens, limit)
+    return [_kb_questions[i] for _, i in top]
+
+
+def _fallback_reply(msg: NormalizedMsg) -> str:
+    triggers = _scan_triggers(msg.lower)
+    related = _related_topics(msg)
     related_text = ""
     if related:
         related_text = "\nRelated topics you can ask: " + ", ".join(related)
 
-    if "liveness" in text and "500" in text:
+    if {"liveness", "500"} <= triggers:
         return (
             "Try this checklist for liveness probe 500 errors:\n"
             "1) Confirm the probe path/port matches your app endpoint.\n"
@@ -312,7 +721,7 @@ def _fallback_reply(message: str, knowledge: list[dict]) -> str:
             f"{related_text}"
         )
 
-    if "readiness" in text or "liveness" in text or "probe" in text:
+    if triggers & {"readiness", "liveness", "probe"}:
         return (
             "Probe issue detected. Verify probe path, port, and timing fields "
             "(`initialDelaySeconds`, `timeoutSeconds`, `periodSeconds`, `failureThreshold`), "
@@ -320,7 +729,7 @@ def _fallback_reply(message: str, knowledge: list[dict]) -> str:
             f"{related_text}"
         )
 
-    if "openstack" in text or "nova" in text or "neutron" in text or "cinder" in text:
+    if triggers & {"openstack", "nova", "neutron", "cinder"}:
         return (
             "OpenStack issue detected. Start with: "
             "`openstack token issue`, `openstack server list`, `openstack volume list`, "
@@ -336,44 +745,142 @@ def _fallback_reply(message: str, knowledge: list[dict]) -> str:
     )
 
 
+@contextlib.asynccontextmanager
+async def _lifespan(app: FastAPI) -> AsyncIterator[None]:
+    global _http_client, _flush_task, _pending_lock, _flush_requested
+    # Index the KB (and warm the scoring kernel for large ones) before the first request.
+    await asyncio.to_thread(_load_knowledge)
+    _pending_lock = asyncio.Lock()
+    _flush_requested = asyncio.Event()
+    _http_client = httpx.AsyncClient(
+        timeout=20,
+        limits=httpx.Limits(max_keepalive_connections=20),
+    )
+    _flush_task = asyncio.create_task(_flush_loop())
+    try:
+        yield
+    finally:
+        _flush_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await _flush_task
+        _flush_task = None
+        await _flush_unknowns()
+        _pending_lock = None
+        _flush_requested = None
+
+        await _http_client.aclose()
+        _http_client = None
+
+
+app = FastAPI(title="gluebot1", lifespan=_lifespan)
+
+
 @app.get("/")
 def read_root() -> dict[str, str]:
     return {"status": "ok"}
 
 
-@app.post("/chat", response_model=ChatResponse)
-def chat(payload: ChatRequest) -> ChatResponse:
-    load_dotenv(dotenv_path=DOTENV_PATH, override=True)
-    openai_api_key = os.getenv("OPENAI_API_KEY", "").strip()
-    openrouter_api_key = os.getenv("OPENROUTER_API_KEY", "").strip()
-    llm_api_key = openai_api_key or openrouter_api_key
-    llm_model = os.getenv("OPENAI_MODEL", "gpt-4.1-mini").strip()
-
-    knowledge = _load_knowledge()
-
-    smalltalk = _smalltalk_reply(payload.message)
+def _local_reply(msg: NormalizedMsg) -> ChatResponse | None:
+    # Replies below are pure functions of the normalized text (and KB version), so short ones are memoized.
+    smalltalk = _smalltalk_reply(msg.lower)
     if smalltalk:
         return ChatResponse(reply=smalltalk, source="intent")
 
-    matched = _find_reply(payload.message, knowledge)
+    matched = _find_reply(msg.lower, msg.tokens, _kb_version)
     if matched:
         return ChatResponse(reply=matched, source="knowledge.json")
 
-    scripted = _openstack_script_reply(payload.message)
+    scripted = _openstack_script_reply(msg.lower)
     if scripted:
         return ChatResponse(reply=scripted, source="template:openstack_script")
 
-    if _is_incident_like(payload.message):
-        _track_unknown_issue(payload.message, knowledge)
+    return None
 
-    llm = _llm_reply(payload.message, knowledge)
-    if llm:
-        return ChatResponse(reply=llm, source=f"llm:{llm_model}")
 
-    if not llm_api_key:
+def _fallback_response(msg: NormalizedMsg) -> ChatResponse:
+    if not LLM_API_KEY:
         return ChatResponse(
-            reply=_fallback_reply(payload.message, knowledge),
+            reply=_fallback_reply(msg),
             source="fallback:no_llm_api_key",
         )
 
-    return ChatResponse(reply=_fallback_reply(payload.message, knowledge), source="fallback:llm_unavailable")
+    return ChatResponse(reply=_fallback_reply(msg), source="fallback:llm_unavailable")
+
+
+async def _remote_reply(msg: NormalizedMsg, background: BackgroundTasks) -> ChatResponse:
+    if _is_incident_like(msg):
+        background.add_task(_track_unknown_issue, msg.stripped)
+
+    llm = await _llm_reply(msg.raw)
+    if llm:
+        return ChatResponse(reply=llm, source=f"llm:{LLM_MODEL}")
+
+    return _fallback_response(msg)
+
+
+def _sse(event: dict[str, str]) -> bytes:
+    return b"data: " + orjson.dumps(event) + b"\n\n"
+
+
+async def _stream_reply(msg: NormalizedMsg, background: BackgroundTasks) -> AsyncIterator[bytes]:
+    # Emits `{"delta": ...}` events followed by a final `{"source": ...}` event.
+    local = _local_reply(msg)
+    if local:
+        yield _sse({"delta": local.reply})
+        yield _sse({"source": local.source})
+        return
+
+    if _is_incident_like(msg):
+        background.add_task(_track_unknown_issue, msg.stripped)
+
+    streamed = False
+    try:
+        async for delta in _llm_stream(msg.raw):
+            streamed = True
+            yield _sse({"delta": delta})
+    except httpx.HTTPError:
+        pass
+    if streamed:
+        yield _sse({"source": f"llm:{LLM_MODEL}"})
+        return
+
+    fallback = _fallback_response(msg)
+    yield _sse({"delta": fallback.reply})
+    yield _sse({"source": fallback.source})
+
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat(payload: ChatRequest, background: BackgroundTasks) -> ChatResponse:
+    _maybe_reload_env()
+    _load_knowledge()
+    msg = _normalize(payload.message)
+    return _local_reply(msg) or await _remote_reply(msg, background)
+
+
+@app.post("/chat_batch", response_model=list[ChatResponse | None])
+async def chat_batch(payload: ChatBatchRequest, background: BackgroundTasks) -> list[ChatResponse | None]:
+    _maybe_reload_env()
+    _load_knowledge()
+
+    msgs = [_normalize(message) for message in payload.messages]
+    replies = [_local_reply(msg) for msg in msgs]
+    if payload.local_only:
+        # Intent, KB and script replies only: no LLM calls and no unknown-issue tracking.
+        return replies
+
+    pending = [i for i, reply in enumerate(replies) if reply is None]
+    remote = await asyncio.gather(*(_remote_reply(msgs[i], background) for i in pending))
+    for i, reply in zip(pending, remote):
+        replies[i] = reply
+    return replies
+
+
+@app.post("/chat_stream")
+async def chat_stream(payload: ChatRequest, background: BackgroundTasks) -> StreamingResponse:
+    _maybe_reload_env()
+    _load_knowledge()
+    return StreamingResponse(
+        _stream_reply(_normalize(payload.message), background),
+        media_type="text/event-stream",
+        background=background,
+    )